@@ -1,8 +1,13 @@
+import os
+import tempfile
 import unittest
 from collections import OrderedDict
 import numpy as np
+from sif_tools import utils
 from sif_tools.utils import FILE, MATH
-from sif_tools.SIFopen import read_file
+from sif_tools.SIFopen import inspect, read_file
+from sif_tools.CONVERT import sif2array
+from sif_tools import spectral
 
 #python -m unittest discover -s tests
 
@@ -35,15 +40,101 @@ class TestFILE(unittest.TestCase):
         calibration = FILE.extract_calibration(info_multi)
         np.testing.assert_array_equal(calibration, expected_output)
 
+    def test_extract_calibration_empty(self):
+        info_empty = OrderedDict({
+            'DetectorDimensions': [100],
+            'Calibration_data': []
+        })
+        calibration = FILE.extract_calibration(info_empty)
+        np.testing.assert_array_equal(calibration, np.zeros(100))
+
+    def test_extract_calibration_multi_different_degrees(self):
+        info_multi = OrderedDict({
+            'DetectorDimensions': [100],
+            'NumberOfFrames': 2,
+            'Calibration_data_for_frame_1': [1, 2],
+            'Calibration_data_for_frame_2': [3]
+        })
+        pixels = np.arange(1, 101)
+        expected_output = np.array([1 + 2 * pixels, np.full(100, 3)])
+        calibration = FILE.extract_calibration(info_multi)
+        np.testing.assert_array_equal(calibration, expected_output)
+
+    def test_extract_calibration_returns_independent_copies(self):
+        info_single = OrderedDict({
+            'DetectorDimensions': [100],
+            'Calibration_data': [5, 2]
+        })
+        calibration = FILE.extract_calibration(info_single)
+        calibration += 1
+        np.testing.assert_array_equal(FILE.extract_calibration(info_single), 5 + 2 * np.arange(1, 101))
+
     def test_extract_files_from_folder(self):
         extracted_files = FILE.extract_files_from_folder(self.test_dir)
         self.assertCountEqual(extracted_files, self.test_files)
 
+    def test_parse_file_object(self):
+        file = os.path.join(self.test_dir, self.test_files[0])
+        with open(file, 'rb') as f:
+            data, info = FILE.parse(f)
+        expected_data, expected_info = FILE.parse(file)
+        np.testing.assert_array_equal(data, expected_data)
+        self.assertEqual(info, expected_info)
+
+    def test_parse_cache(self):
+        file = os.path.join(self.test_dir, self.test_files[0])
+        FILE.enable_cache()
+        self.addCleanup(FILE.enable_cache, False)
+
+        FILE.parse(file)
+        FILE.parse(file)
+        self.assertEqual(utils._parse_cached.cache_info().hits, 1)
+
+        FILE.clear_cache()
+        self.assertEqual(utils._parse_cached.cache_info().currsize, 0)
+
+        FILE.enable_cache(False)
+        self.assertIsNone(utils._parse_cached)
+
+    def test_parse_returns_independent_copies(self):
+        file = os.path.join(self.test_dir, self.test_files[0])
+        FILE.enable_cache()
+        self.addCleanup(FILE.enable_cache, False)
+        data, info = FILE.parse(file)
+        expected_data, expected_info = FILE.parse(file)
+
+        data[:, 1] -= 1
+        info['tile'].append('changed')
+        info['DetectorDimensions'] = None
+
+        data, info = FILE.parse(file)
+        np.testing.assert_array_equal(data, expected_data)
+        self.assertEqual(info, expected_info)
+        self.assertTrue(data[:, 1].flags.c_contiguous)
+
+    def test_load_spectra(self):
+        files = [os.path.join(self.test_dir, file) for file in self.test_files[:3]]
+        spectra = FILE.load_spectra(files, window='narrow', reduce_noise=True)
+        self.assertEqual(len(spectra), len(files))
+        for file, (wavelengths, counts) in zip(files, spectra):
+            expected_wavelengths, expected_counts = FILE.load_spectrum(file, window='narrow', reduce_noise=True)
+            np.testing.assert_array_equal(wavelengths, expected_wavelengths)
+            np.testing.assert_array_equal(counts, expected_counts)
+
+    def test_parse_folder(self):
+        files = FILE.extract_files_from_folder(self.test_dir)
+        parsed = FILE.parse_folder(self.test_dir)
+        self.assertEqual(len(parsed), len(self.test_files))
+        for file, (data, info) in zip(files, parsed):
+            expected_data, expected_info = FILE.parse(os.path.join(self.test_dir, file))
+            np.testing.assert_array_equal(data, expected_data)
+            self.assertEqual(info, expected_info)
+
     def test_extract_positions(self):
         files = ['file_1_0_0.sif', 'file_2_1_1.sif', 'file_3_2_2.sif']
-        expected_positions = [0, 1, 2]
-        positions = FILE.extract_positions(files)
-        self.assertEqual(positions, expected_positions)
+        expected_positions = np.array([1, 2, 3])
+        positions = FILE.extract_positions(files, 1)
+        np.testing.assert_array_equal(positions, expected_positions)
 
     def test_extract_info(self):
         info = OrderedDict({'key1': 'value1', 'key2': 'value2'})
@@ -52,6 +143,86 @@ class TestFILE(unittest.TestCase):
             self.assertIn('INFO:root:key1: value1', log.output)
             self.assertIn('INFO:root:key2: value2', log.output)
 
+class TestSIFopen(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_file = 'UnitTests/UnitTest files/test_1.sif'
+
+    def _truncated_copy(self):
+        # Cut the file halfway through its last frame
+        data, info = read_file(self.test_file)
+        frame_bytes = data[0].nbytes
+        with open(self.test_file, 'rb') as f:
+            content = f.read(info['offset'] + frame_bytes * (len(data) - 1) + frame_bytes // 2)
+
+        handle, path = tempfile.mkstemp(suffix='.sif')
+        with os.fdopen(handle, 'wb') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path, len(data) - 1
+
+    def test_read_file_memmap(self):
+        eager, eager_info = read_file(self.test_file)
+        lazy, lazy_info = read_file(self.test_file, lazy='memmap')
+        np.testing.assert_array_equal(lazy, eager)
+        self.assertEqual(lazy_info, eager_info)
+        self.assertFalse(lazy.flags.writeable)
+
+    def test_read_file_memmap_keeps_position(self):
+        with open(self.test_file, 'rb') as f:
+            inspect(f)
+            header_end = f.tell()
+            f.seek(0)
+            read_file(f, lazy='memmap')
+            self.assertEqual(f.tell(), header_end)
+
+    def test_read_file_truncated(self):
+        path, complete_frames = self._truncated_copy()
+        for lazy in (None, 'memmap'):
+            with self.subTest(lazy=lazy):
+                with self.assertRaises(ValueError):
+                    read_file(path, lazy=lazy)
+                with self.assertWarns(UserWarning):
+                    data, _ = read_file(path, ignore_corrupt=True, lazy=lazy)
+                self.assertEqual(len(data), complete_frames)
+
+    def test_read_file_invalid_lazy(self):
+        with self.assertRaises(ValueError):
+            read_file(self.test_file, lazy='dask')
+
+class TestCONVERT(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_file = 'UnitTests/UnitTest files/test_1.sif'
+
+    def test_sif2array_list(self):
+        single = sif2array(self.test_file)
+        combined = sif2array([self.test_file, self.test_file])
+        self.assertEqual(combined.shape, (2 * len(single), 2))
+        np.testing.assert_array_equal(combined, np.concatenate([single, single]))
+        self.assertEqual(sif2array([]).shape, (0, 2))
+
+    def test_sif2array_bytes_path(self):
+        np.testing.assert_array_equal(sif2array(os.fsencode(self.test_file)), sif2array(self.test_file))
+
+class TestSpectral(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_dir = 'UnitTests/UnitTest files'
+        cls.background_file = 'test_background.sif'
+
+    def test_process_files_descending_background(self):
+        files = spectral._get_files(self.test_dir, self.background_file)
+        for reduce_noise in (False, True):
+            with self.subTest(reduce_noise=reduce_noise):
+                bg_wavelengths, bg_counts = spectral._process_background(self.test_dir, self.background_file, 'pinched', reduce_noise)
+                ascending = spectral._process_files(self.test_dir, files, (bg_wavelengths, bg_counts), 'pinched', reduce_noise)
+                descending = spectral._process_files(self.test_dir, files, (bg_wavelengths[::-1], bg_counts[::-1]), 'pinched', reduce_noise)
+                np.testing.assert_array_equal(descending, ascending)
+
 class TestMATH(unittest.TestCase):
 
     def test_gradient_n_sigma(self):
@@ -63,6 +234,14 @@ class TestMATH(unittest.TestCase):
         np.testing.assert_array_equal(filtered_wavelengths, expected_wavelengths)
         np.testing.assert_array_equal(filtered_counts, expected_counts)
 
+    def test_gradient_n_sigma_accepts_lists(self):
+        wavelengths = [1, 2, 3, 4, 5, 6]
+        counts = [1, 100, 3, 4, 100, 6]
+        filtered_wavelengths, filtered_counts = MATH.gradient_n_sigma(wavelengths, counts)
+        expected_wavelengths, expected_counts = MATH.gradient_n_sigma(np.array(wavelengths), np.array(counts))
+        np.testing.assert_array_equal(filtered_wavelengths, expected_wavelengths)
+        np.testing.assert_array_equal(filtered_counts, expected_counts)
+
     def test_slice_window(self):
         data = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
         expected_reduced = np.array([2, 3, 4, 5, 6, 7, 8, 9])
@@ -71,6 +250,8 @@ class TestMATH(unittest.TestCase):
         np.testing.assert_array_equal(MATH.slice_window(data, 'reduced'), expected_reduced)
         np.testing.assert_array_equal(MATH.slice_window(data, 'narrow'), expected_narrow)
         np.testing.assert_array_equal(MATH.slice_window(data, 'pinched'), expected_pinched)
+        # Too short to slice anything off either end, so it comes back whole rather than empty
+        np.testing.assert_array_equal(MATH.slice_window(np.arange(2), 'reduced'), np.arange(2))
 
     def test_normalize_array(self):
         array = np.array([1, 2, 3, 4, 5])
@@ -5,4 +5,9 @@ file = 'UnitTests/UnitTest files/test_1.sif'
 
 data = sif2array(target=file, reduce_noise=True, window='reduced')
 
-np.savetxt('test_1.csv', data, delimiter=",", header="Wavelength,Counts", comments='')
\ No newline at end of file
+# A short format string and a large write buffer keep the export fast for big spectra
+with open('test_1.csv', 'wb', buffering=1 << 20) as f:
+    np.savetxt(f, data, delimiter=",", fmt="%.10g", header="Wavelength,Counts", comments='')
+
+# For a lossless binary copy that loads back with np.load, use:
+# np.save('test_1.npy', data)
\ No newline at end of file
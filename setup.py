@@ -23,7 +23,6 @@ setup(
     python_requires='>=3.6', 
     install_requires=[
         'numpy',  
-        'scipy',
     ],
     entry_points={
         'console_scripts': [
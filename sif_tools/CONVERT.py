@@ -7,32 +7,34 @@ It offers functionality to optionally reduce noise in the data and to slice the
 Functions:
 --------
 - `sif2array`:
-    Convert SIF files to a NumPy array. This method processes the SIF files from the specified target (file or directory),
+    Convert SIF files to a NumPy array. This method processes the SIF files from the specified target (file, directory or list of files),
     optionally reduces noise, and slices the data to a specified window.
 
 - `_get_paths`:
-    Helper method to determine if the target is a file or a directory and extract file paths accordingly.
+    Helper method to resolve the target (file, directory or list of files) into a list of file paths.
 
 """
 
 import os
+
 import numpy as np
 
-from .utils import MATH, FILE
+from .utils import FILE
 
 
 @staticmethod
-def sif2array(target: str, reduce_noise: bool = False, window: str = None):
+def sif2array(target, reduce_noise: bool = False, window: str = None):
     """
     Convert SIF (Spectral Image Format) files to a NumPy array.
 
-    This function processes SIF files from a given target (file or directory),
+    This function processes SIF files from a given target (file, directory or list of files),
     optionally reduces noise, and slices the data to a specified window.
 
     Parameters:
 
-    - `target : str`
-        Path to a SIF file or a directory containing SIF files.
+    - `target : str or list of str`
+        Path to a SIF file, a directory containing SIF files, or a list of SIF file paths.
+        An empty list gives an empty (0, 2) array.
     - `reduce_noise : bool, optional`
         If True, applies noise reduction to the data (default is False).
     - `window : str, optional`
@@ -50,26 +52,31 @@ def sif2array(target: str, reduce_noise: bool = False, window: str = None):
     try:
         paths = _get_paths(target)
 
-        data_list = []
-        for path in paths:
-            data, _ = FILE.parse(path)
-            if window:
-                data = MATH.slice_window(data, window=window)
-            wavelengths, counts = data[:, 0], data[:, 1]
-            if reduce_noise:
-                wavelengths, counts = MATH.gradient_n_sigma(wavelengths, counts)
-            data_list.append(np.column_stack((wavelengths, counts)))
+        spectra = FILE.load_spectra(paths, window=window, reduce_noise=reduce_noise)
+
+        # Write every spectrum straight into one preallocated (rows x 2) array
+        data = np.empty((sum(len(counts) for _, counts in spectra), 2))
+        offset = 0
+        for wavelengths, counts in spectra:
+            n = len(counts)
+            data[offset:offset + n, 0] = wavelengths
+            data[offset:offset + n, 1] = counts
+            offset += n
 
-        return data_list[0] if len(data_list) == 1 else np.vstack(data_list)
+        return data
 
     except Exception as e:
         raise RuntimeError(f"An error occurred while converting SIF to array: {str(e)}")
 
 @staticmethod
 def _get_paths(target):
+    if not isinstance(target, (str, bytes, os.PathLike)):
+        # Already a collection of file paths, no need to stat the target
+        return list(target)
+    target = os.fsdecode(target)
     if os.path.isfile(target):
         return [target]
     elif os.path.isdir(target):
-        return FILE.extract_files_from_folder(target)
+        return [os.path.join(target, file) for file in FILE.extract_files_from_folder(target)]
     else:
         raise ValueError("Target must be a file or directory.")
@@ -1,3 +1,4 @@
+import os
 import warnings
 from collections import OrderedDict
 
@@ -9,6 +10,9 @@ import numpy as np
 
 _MAGIC = 'Andor Technology Multi-Channel File\n'
 
+# Read-ahead size used when scanning header words
+_CHUNK_SIZE = 64
+
 # --------------------------------------------------------------------
 # SIF parser
 def _to_string(c):
@@ -19,35 +23,51 @@ def _read_string(fp, length=None):
     '''Read a string of the given length. If no length is provided, the
     length is read from the file.'''
     if length is None:
-        length = int(_to_string(fp.readline()))        
+        length = int(fp.readline())
     return fp.read(length)
 
-def _read_until(fp, terminator=' '):
-    '''Read a space-delimited word.'''
-    word = ''
+def _read_until(fp, terminator=b' '):
+    '''Read a word as bytes, up to and consuming the next terminator or line end.'''
+    buf = b''
     while True:
-        c = _to_string(fp.read(1))
-        if c == terminator or c == '\n':
-            if len(word) > 0:
-                break
-        word += c
-    return word
+        chunk = fp.read(_CHUNK_SIZE)
+        if not chunk:
+            raise ValueError('Reached the end of the file')
+        buf += chunk
+        end = buf.find(terminator, 1)
+        newline = buf.find(b'\n', 1, None if end < 0 else end)
+        if newline > 0:
+            end = newline
+        if end > 0:
+            fp.seek(end + 1 - len(buf), 1)  # step back to just after the terminator
+            return buf[:end]
 
 def _skip_spaces(fp):
     '''Read until something other than space or line end '''
     while True:
-        offset = fp.tell()
-        c = _to_string(fp.read(1))
-        if c not in [' ', '\n']:
-            fp.seek(offset)
+        chunk = fp.read(_CHUNK_SIZE)
+        rest = chunk.lstrip(b' \n')
+        if rest or len(chunk) < _CHUNK_SIZE:
+            fp.seek(-len(rest), 1)
             return fp
-    raise ValueError('Reached the end of the file')
+
+def _read_into(fp, buffer):
+    '''Fill buffer from fp. Returns the number of bytes read, which is only
+    less than the buffer size if the end of the file is reached.'''
+    view = memoryview(buffer).cast('B')
+    total = 0
+    while total < len(view):
+        n = fp.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
 
 def _read_int(fp):
-    return int(_read_until(fp, ' '))
+    return int(_read_until(fp, b' '))
 
 def _read_float(fp):
-    return float(_read_until(fp, ' '))
+    return float(_read_until(fp, b' '))
 
 def inspect(fp):
     """
@@ -77,11 +97,11 @@ def inspect(fp):
     fp.readline() # 65538 number_of_images? Maybe it is oldest version to open?
 
     # Line 3 - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-    info['SifVersion'] = int(_read_until(fp, ' ')) # 65559, newest 65567
+    info['SifVersion'] = int(_read_until(fp, b' ')) # 65559, newest 65567
     
-    _read_until(fp, ' ') # 0
-    _read_until(fp, ' ') # 0
-    _read_until(fp, ' ') # 1
+    _read_until(fp, b' ') # 0
+    _read_until(fp, b' ') # 0
+    _read_until(fp, b' ') # 1
 
     info['ExperimentTime'] = _read_int(fp) # 1540956289
     info['DetectorTemperature'] = _read_float(fp)
@@ -89,7 +109,7 @@ def inspect(fp):
     
     _read_string(fp, 10) # blanks
     
-    _read_until(fp, ' ') # 0
+    _read_until(fp, b' ') # 0
 
     info['ExposureTime'] = _read_float(fp)
     info['CycleTime'] = _read_float(fp)
@@ -102,20 +122,20 @@ def inspect(fp):
     info['StackCycleTime'] = _read_float(fp)
     info['PixelReadoutTime'] = _read_float(fp) # 1.78571e-09 or 1e-06    
 
-    _read_until(fp, ' ') # 0
-    _read_until(fp, ' ') # 1
+    _read_until(fp, b' ') # 0
+    _read_until(fp, b' ') # 1
     info['GainDAC'] = _read_float(fp)
 
-    _read_until(fp, ' ') # 0
-    _read_until(fp, ' ') # 0
+    _read_until(fp, b' ') # 0
+    _read_until(fp, b' ') # 0
     info['GateWidth'] = _read_float(fp)
 
     for _ in range(16):
-        _read_until(fp, ' ')
+        _read_until(fp, b' ')
     info['GratingBlaze'] = _read_float(fp)
 
     # What is the rest of the line?
-    _read_until(fp, '\n')
+    _read_until(fp, b'\n')
     
     # Line 4 - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
     info['DetectorType'] = _to_string(fp.readline()).strip()
@@ -126,7 +146,7 @@ def inspect(fp):
     
     fp.read(2) # space newline
     # Line 7 - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
-    _read_until(fp, ' ') # 65538
+    _read_until(fp, b' ') # 65538
     # Line 8 - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
     info['user_text'] = _read_string(fp)
     fp.read(1) # newline
@@ -160,7 +180,7 @@ def inspect(fp):
     if 'spectrograph' not in info.keys():
         info['spectrograph'] = 'sif version not checked yet'
 
-    info['SifCalbVersion'] = int(_read_until(fp, ' ')) # 65539
+    info['SifCalbVersion'] = int(_read_until(fp, b' ')) # 65539
     # additional skip for this version
     if info['SifCalbVersion'] == 65540:
         fp.readline()
@@ -191,17 +211,17 @@ def inspect(fp):
     info['DataType'] = _read_string(fp)
     info['ImageAxis'] = _read_string(fp)    
 
-    _read_until(fp, ' ') # 65541 or 65539
+    _read_until(fp, b' ') # 65541 or 65539
 
-    _read_until(fp, ' ') # x0? left? -> x0
-    _read_until(fp, ' ') # x1? bottom? -> y1
-    _read_until(fp, ' ') # y1? right? -> x1
-    _read_until(fp, ' ') # y0? top? -> y0
+    _read_until(fp, b' ') # x0? left? -> x0
+    _read_until(fp, b' ') # x1? bottom? -> y1
+    _read_until(fp, b' ') # y1? right? -> x1
+    _read_until(fp, b' ') # y0? top? -> y0
 
-    no_images = int(_read_until(fp, ' '))
-    no_subimages = int(_read_until(fp, ' '))
-    total_length = int(_read_until(fp, ' '))
-    image_length = int(_read_until(fp, ' '))
+    no_images = int(_read_until(fp, b' '))
+    no_subimages = int(_read_until(fp, b' '))
+    total_length = int(_read_until(fp, b' '))
+    image_length = int(_read_until(fp, b' '))
     info['NumberOfFrames'] = no_images
     info['NumberOfSubImages'] = no_subimages
     info['TotalLength'] = total_length
@@ -209,7 +229,7 @@ def inspect(fp):
 
     for i in range(no_subimages):
         # read subimage information
-        _read_until(fp, ' ') # 65538
+        _read_until(fp, b' ') # 65538
 
         frame_area = fp.readline().strip().split()
         x0, y1, x1, y0, ybin, xbin = map(int,frame_area[:6])
@@ -280,7 +300,7 @@ def extract_user_text(info):
     del info['user_text']
     return info
 
-def read_file(sif_file, ignore_corrupt=False):
+def read_file(sif_file, ignore_corrupt=False, lazy=None):
     """
     Open sif_file and return as np.array.
 
@@ -290,31 +310,51 @@ def read_file(sif_file, ignore_corrupt=False):
         path to the file
     ignore_corrupt: 
         True if ignore the corrupted frames.
-    lazy: either of None | 'memmap' | 'dask'
+    lazy: either of None | 'memmap'
         None: load all the data into the memory
-        'memmap': returns np.memmap pointing on the disk
-        'dask': returns dask.Array that consists of np.memmap
-            This requires dask installed into the computer.
+        'memmap': returns a read-only np.memmap pointing on the disk
     """
-    
+    if lazy not in (None, 'memmap'):
+        raise ValueError("lazy must be None or 'memmap', not {!r}".format(lazy))
+
     will_close = False
     try:
         f = sif_file
         tile, size, no_images, info = inspect(f)
     except AttributeError:
         f = open(sif_file,'rb')
-        tile, size, no_images, info = inspect(f)
         will_close = True
 
-    data = np.ndarray((no_images, size[1], size[0]), dtype=np.float32)
+    try:
+        if will_close:
+            tile, size, no_images, info = inspect(f)
+
+        # Frames are stored back to back after the header
+        shape = (no_images, size[1], size[0])
+        frame_bytes = size[0] * size[1] * 4
+        n_frames = no_images
+
+        if lazy == 'memmap':
+            end = os.fstat(f.fileno()).st_size
+            if frame_bytes > 0:
+                n_frames = min(no_images, max(end - info['offset'], 0) // frame_bytes)
+            if n_frames > 0:
+                # np.memmap seeks to the end of the file; leave a caller's file object where inspect left it
+                position = f.tell()
+                data = np.memmap(f, dtype='<f4', mode='r', offset=info['offset'], shape=(n_frames,) + shape[1:])
+                f.seek(position)
+            else:
+                data = np.empty((0,) + shape[1:], dtype='<f4')
+        else:
+            data = np.empty(shape, dtype='<f4')
 
-    for i, tile1 in enumerate(tile):
-        f.seek(tile1[2])  # offset
-        try:
-            data[i] = np.fromfile(f, count=size[0]*size[1],dtype='<f').reshape(size[1],size[0])
+            # Read all frames in one call
+            if no_images > 0 and frame_bytes > 0:
+                f.seek(info['offset'])
+                n_frames = _read_into(f, data) // frame_bytes
 
-        except ValueError:
-            data = data[:i]
+        if n_frames < no_images:
+            data = data[:n_frames]
             if not ignore_corrupt:
                 raise ValueError(
                     'The file might be corrupt. Number of files should be {} '
@@ -330,9 +370,9 @@ def read_file(sif_file, ignore_corrupt=False):
                         no_images, len(data)
                     )
                 )
-
-    if will_close:
-        f.close()
+    finally:
+        if will_close:
+            f.close()
           
     return data, info
 
@@ -1,2 +1,2 @@
-from .SPECTRAL import hyperspectrum
+from .spectral import hyperspectrum
 from .CONVERT import sif2array
\ No newline at end of file
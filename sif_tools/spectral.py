@@ -26,8 +26,8 @@ Functions:
 """
 
 import os
+
 import numpy as np
-from scipy.interpolate import interp1d
 
 from .utils import MATH, FILE
 
@@ -73,7 +73,7 @@ def hyperspectrum(directory: str,
         pixels = _process_files(directory, files, background_data, window, reduce_noise)
         
         if normalize:
-            pixels = MATH.normalize_array(np.array(pixels))
+            pixels = MATH.normalize_array(pixels)
 
         heatmap_data = _create_heatmap(size, positions, pixels)
 
@@ -124,9 +124,8 @@ def _get_files(directory, background):
     - `list`
         List of spectrum files excluding the background file.
     """
-    files = FILE.extract_files_from_folder(directory)
-    files.remove(os.path.basename(background))  # Remove background file from list of files
-    return files
+    background = os.path.basename(background)
+    return [file for file in FILE.extract_files_from_folder(directory) if file != background]
 
 @staticmethod
 def _process_background(directory, background, window, reduce_noise):
@@ -149,14 +148,7 @@ def _process_background(directory, background, window, reduce_noise):
     - `tuple`
         Processed background wavelengths and counts.
     """
-    background_data, _ = FILE.parse(os.path.join(directory, background))
-    background_data = MATH.slice_window(background_data, window=window)
-    bg_wavelengths, bg_counts = background_data[:, 0], background_data[:, 1]
-
-    if reduce_noise:
-        bg_wavelengths, bg_counts = MATH.gradient_n_sigma(bg_wavelengths, bg_counts)
-
-    return bg_wavelengths, bg_counts
+    return FILE.load_spectrum(os.path.join(directory, background), window, reduce_noise)
 
 @staticmethod
 def _process_files(directory, files, background_data, window, reduce_noise):
@@ -178,24 +170,44 @@ def _process_files(directory, files, background_data, window, reduce_noise):
 
     Returns:
 
-    - `list`
-        List of pixel values representing adjusted counts for each file.
+    - `np.ndarray`
+        Array of pixel values representing adjusted counts for each file.
     """
     bg_wavelengths, bg_counts = background_data
-    pixels = []
 
-    for file in files:
-        data, _ = FILE.parse(os.path.join(directory, file))
-        data = MATH.slice_window(data, window=window)
-        wavelengths, counts = data[:, 0], data[:, 1]
+    # np.interp needs increasing sample points, so sort the background once up front
+    if np.any(np.diff(bg_wavelengths) < 0):
+        order = np.argsort(bg_wavelengths, kind='stable')
+        bg_wavelengths, bg_counts = bg_wavelengths[order], bg_counts[order]
+
+    spectra = FILE.load_spectra([os.path.join(directory, file) for file in files], window, reduce_noise)
+
+    if not spectra:
+        return np.empty(0, dtype=np.int64)
+
+    grid = spectra[0][0]
+
+    if all(np.array_equal(wavelengths, grid) for wavelengths, _ in spectra):
+        # All files share one wavelength grid: subtract and sum the whole scan in one batch
+        bg_counts_interpolated = np.interp(grid, bg_wavelengths, bg_counts, left=0, right=0)
+        adjusted_counts = np.stack([counts for _, counts in spectra])
+        adjusted_counts -= bg_counts_interpolated
+        np.maximum(adjusted_counts, 0, out=adjusted_counts)
+        return adjusted_counts.sum(axis=1).astype(np.int64)
 
-        if reduce_noise:
-            wavelengths, counts = MATH.gradient_n_sigma(wavelengths, counts)
+    # Grids differ (noise reduction drops different points per file), but interpolation is pointwise,
+    # so run the whole scan through one np.interp call and sum each file's segment with reduceat
+    lengths = np.fromiter((len(counts) for _, counts in spectra), dtype=np.intp, count=len(spectra))
+    wavelengths = np.concatenate([wavelengths for wavelengths, _ in spectra])
+    adjusted_counts = np.concatenate([counts for _, counts in spectra]).astype(np.float64, copy=False)
+    adjusted_counts -= np.interp(wavelengths, bg_wavelengths, bg_counts, left=0, right=0)
+    np.maximum(adjusted_counts, 0, out=adjusted_counts)
 
-        bg_interp = interp1d(bg_wavelengths, bg_counts, kind='linear', bounds_error=False, fill_value=0)
-        bg_counts_interpolated = bg_interp(wavelengths)
-        adjusted_counts = np.maximum(counts - bg_counts_interpolated, 0)
-        pixels.append(int(np.sum(adjusted_counts)))
+    starts = np.cumsum(lengths) - lengths
+    nonempty = lengths > 0
+    pixels = np.zeros(len(spectra), dtype=np.int64)
+    if nonempty.any():
+        pixels[nonempty] = np.add.reduceat(adjusted_counts, starts[nonempty])
 
     return pixels
 
@@ -208,8 +220,8 @@ def _create_heatmap(size, positions, normalized_pixels):
 
     - `size : tuple`
         Distribution of images. If 25 images taken in 5x5, tuple should be (5,5).
-    - `positions : list`
-        List of positions for each file.
+    - `positions : np.ndarray`
+        Image index of each file.
     - `normalized_pixels : np.ndarray`
         Normalized pixel values representing adjusted counts for each file.
 
@@ -219,11 +231,9 @@ def _create_heatmap(size, positions, normalized_pixels):
         A 2D array representing the heatmap data.
     """
     max_x, max_y = size
-    heatmap_data = np.zeros((max_y, max_x))
+    heatmap_data = np.zeros(max_x * max_y)
 
-    for idx, count in zip(positions, normalized_pixels):
-        x = (idx - 1) % max_x
-        y = (idx - 1) // max_x
-        heatmap_data[y, x] = count
+    # Image indices are 1-based and row-major, so they address the flattened grid directly
+    heatmap_data[positions - 1] = normalized_pixels
 
-    return heatmap_data
+    return heatmap_data.reshape(max_y, max_x)
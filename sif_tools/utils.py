@@ -1,16 +1,123 @@
+import copy
 import typing
 import os
 from collections import OrderedDict
+from functools import lru_cache
 
 import numpy as np
 
-try:
-    from .SIFopen import read_file
-except:
-    try:
-        from SIFopen import read_file
-    except:
-        raise
+from .SIFopen import read_file
+
+
+# Fraction of entries sliced from each end by MATH.slice_window, as 1/divisor
+_WINDOW_DIVISORS = {
+    'reduced': 10,
+    'narrow': 4,
+    'pinched': 3,
+}
+
+
+def _horner(coefs: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Evaluate polynomials stored lowest order first with Horner's scheme, updating one buffer in place.
+
+    `coefs` is [degree + 1] for one polynomial or [NumberOfFrames x degree + 1] for one per frame,
+    giving a result of [width] or [NumberOfFrames x width].
+    """
+    dtype = np.result_type(coefs, x)
+
+    # No coefficients is the zero polynomial, as with np.poly1d([])
+    if coefs.shape[-1] == 0:
+        return np.zeros(coefs.shape[:-1] + x.shape, dtype=dtype)
+
+    # Trailing axis lets each polynomial's coefficients broadcast across the pixels
+    coefs = coefs[..., None]
+
+    y = np.empty(coefs.shape[:-2] + x.shape, dtype=dtype)
+    y[...] = coefs[..., -1, :]
+    for k in range(coefs.shape[-2] - 2, -1, -1):
+        y *= x
+        y += coefs[..., k, :]
+
+    return y
+
+
+@lru_cache(maxsize=32)
+def _calibration_cached(coefs: tuple, width: int, dtype: np.dtype = np.dtype(np.float64)) -> np.ndarray:
+    """
+    Evaluate calibration polynomials over the detector pixels once per (coefficients, width, dtype) key.
+
+    The returned array is shared between callers and is therefore marked read-only.
+    """
+    pixels = np.arange(1, width + 1, dtype=dtype)
+
+    calibration = _horner(np.array(coefs, dtype=dtype), pixels)
+    calibration.setflags(write=False)
+    return calibration
+
+
+def _calibration_shared(info: OrderedDict, dtype: typing.Type[np.floating] = np.float64) -> typing.Optional[np.ndarray]:
+    """
+    Extract calibration data from info as the shared read-only array from the calibration cache.
+    """
+    width = info['DetectorDimensions'][0]
+
+    first_frame = info.get('Calibration_data_for_frame_1')
+    if first_frame is not None:
+        frames = [first_frame] + [info[f'Calibration_data_for_frame_{f + 1}'] for f in range(1, info['NumberOfFrames'])]
+
+        # Frames may store polynomials of different degree; trailing zeros stack them into one table
+        degree = max(len(frame) for frame in frames)
+        coefs = tuple(tuple(frame) + (0.0,) * (degree - len(frame)) for frame in frames)
+        return _calibration_cached(coefs, width, np.dtype(dtype))
+
+    calibration_data = info.get('Calibration_data')
+    if calibration_data is not None:
+        return _calibration_cached(tuple(calibration_data), width, np.dtype(dtype))
+    
+    return None
+
+
+def _parse_file(file) -> typing.Tuple[np.ndarray, OrderedDict]:
+    """
+    Parse a .sif file, or an open binary file object, into a (channels x 2) array and its info.
+    """
+    data, info = read_file(file)
+    wavelengths = _calibration_shared(info)
+
+    # Fill both columns of one preallocated buffer; ravel() is a view of the contiguous frames.
+    # Building it as rows and transposing keeps each column contiguous in memory
+    columns = np.empty((2, data.size))
+    columns[0] = wavelengths.ravel()
+    columns[1] = data.ravel()
+
+    return columns.T, info
+
+
+def _parse_readonly(path: str, mtime_ns: int, size: int) -> typing.Tuple[np.ndarray, OrderedDict]:
+    """
+    Parse a .sif file for the parse cache, keyed by (path, modification time, size).
+
+    The returned array is shared between callers and is therefore marked read-only.
+    """
+    df, info = _parse_file(path)
+    df.setflags(write=False)
+    return df, info
+
+
+# lru_cache-wrapped _parse_readonly while FILE.enable_cache() is on, None otherwise
+_parse_cached = None
+
+
+def _parse_shared(file) -> typing.Tuple[np.ndarray, OrderedDict]:
+    """
+    Parse a .sif file, through the parse cache when it is enabled and `file` is a path.
+    """
+    if _parse_cached is None or not isinstance(file, (str, bytes, os.PathLike)):
+        return _parse_file(file)
+
+    stat = os.stat(file)
+    return _parse_cached(os.path.abspath(file), stat.st_mtime_ns, stat.st_size)
 
 
 class FILE:
@@ -20,23 +127,38 @@ class FILE:
 
     Methods
     -------
-    extract_calibration(info: OrderedDict) -> typing.Optional[np.ndarray]
+    extract_calibration(info: OrderedDict, dtype: typing.Type[np.floating] = np.float64) -> typing.Optional[np.ndarray]
         Extract calibration data from info.
 
     parse(file: str) -> typing.Tuple[np.ndarray, OrderedDict]
         Parse a .sif file.
 
+    enable_cache(enabled: bool = True, maxsize: typing.Optional[int] = 256) -> None
+        Turn the in-memory parse cache on or off. It is off by default.
+
+    clear_cache() -> None
+        Drop every entry from the parse cache, if it is enabled.
+
+    load_spectrum(file: str, window: str = None, reduce_noise: bool = False) -> typing.Tuple[np.ndarray, np.ndarray]
+        Parse a .sif file and return its windowed, optionally denoised, wavelengths and counts.
+
+    load_spectra(files: typing.List[str], window: str = None, reduce_noise: bool = False) -> typing.List[typing.Tuple[np.ndarray, np.ndarray]]
+        Load the windowed, optionally denoised, wavelengths and counts of several .sif files.
+
     extract_files_from_folder(path: str, file_extension: str = '.sif') -> typing.List[str]
         Extract files with a specific extension from a folder.
 
-    extract_positions(files: typing.List[str]) -> typing.List[typing.Tuple[str, str, str]]
-        Extract image numbers and coordinates from filenames using a regular expression pattern.
+    parse_folder(path: str, file_extension: str = '.sif') -> typing.List[typing.Tuple[np.ndarray, OrderedDict]]
+        Parse every file with a specific extension in a folder.
+
+    extract_positions(files: typing.List[str], _pos: int) -> np.ndarray
+        Extract image indices from filenames as an integer array.
 
     extract_info(info: OrderedDict, show_info: str) -> None
         Optionally print the info based on the flag show_info.
     """
 
-    def extract_calibration(info: OrderedDict) -> typing.Optional[np.ndarray]:
+    def extract_calibration(info: OrderedDict, dtype: typing.Type[np.floating] = np.float64) -> typing.Optional[np.ndarray]:
         """
         Extract calibration data from info.
 
@@ -44,6 +166,10 @@ class FILE:
         ----------
         info: OrderedDict
             OrderedDict from read_file()
+        
+        dtype: numpy floating type, optional
+            Precision used to evaluate and return the calibration (default is np.float64).
+            np.float32 resolves nm-scale wavelengths but is less precise than the stored coefficients.
 
         Returns
         -------
@@ -51,22 +177,14 @@ class FILE:
             1D array of size [width] if only one calibration is found.
             2D array of size [NumberOfFrames x width] if multiple calibrations are found.
             None if no calibration is found.
+
+        Notes
+        -----
+        Files from the same detector share their calibration, so evaluated calibrations are
+        cached; each call returns its own copy.
         """
-        width = info['DetectorDimensions'][0]
-        
-        if 'Calibration_data_for_frame_1' in info:
-            calibration = np.ndarray((info['NumberOfFrames'], width))
-            for f in range(info['NumberOfFrames']):
-                key = f'Calibration_data_for_frame_{f + 1}'
-                flip_coef = np.flipud(info[key])
-                calibration[f] = np.poly1d(flip_coef)(np.arange(1, width + 1))
-            return calibration
-
-        elif 'Calibration_data' in info:
-            flip_coef = np.flipud(info['Calibration_data'])
-            return np.poly1d(flip_coef)(np.arange(1, width + 1))
-        
-        return None
+        calibration = _calibration_shared(info, dtype)
+        return None if calibration is None else calibration.copy()
 
     def parse(file: str) -> typing.Tuple[np.ndarray, OrderedDict]:
         """
@@ -75,7 +193,7 @@ class FILE:
         Parameters
         ----------
         file: str
-            Path to a .sif file.
+            Path to a .sif file, or an open binary file object.
         
         Returns
         -------
@@ -83,14 +201,102 @@ class FILE:
             A tuple containing:
             - A 2D numpy array (channels x 2) with the first element of each row being the wavelength bin and the second being the counts.
             - An OrderedDict with information about the measurement.
+
+        Notes
+        -----
+        With FILE.enable_cache() on, results for paths are served from the parse cache. Each
+        call still returns its own copy of the array and info, so modifying them does not
+        affect later calls.
+        """
+        df, info = _parse_shared(file)
+        if df.flags.writeable:
+            # Parsed for this call only, nothing else holds a reference
+            return df, info
+        # order='K' keeps the column-contiguous layout of the cached array
+        return df.copy(order='K'), copy.deepcopy(info)
+
+    def enable_cache(enabled: bool = True, maxsize: typing.Optional[int] = 256) -> None:
+        """
+        Turn the in-memory parse cache on or off. It is off by default.
+
+        Parameters
+        ----------
+        enabled: bool, optional
+            True to cache parsed files, False to stop caching and drop all entries (default is True).
+        
+        maxsize: int or None, optional
+            Number of files to keep (default is 256). None keeps every file parsed. Set it to at
+            least the number of files in a scan, or repeat runs over the scan never hit the cache.
+
+        Notes
+        -----
+        Entries are keyed by absolute path, modification time and size. On filesystems with
+        coarse modification times (FAT, SMB, HFS+), a file overwritten with one of the same size
+        can be served from its old entry; call FILE.clear_cache() after rewriting files.
+        """
+        global _parse_cached
+        _parse_cached = lru_cache(maxsize=maxsize)(_parse_readonly) if enabled else None
+
+    def clear_cache() -> None:
+        """
+        Drop every entry from the parse cache, if it is enabled.
         """
-        data, info = read_file(file)
-        wavelengths = FILE.extract_calibration(info)
+        if _parse_cached is not None:
+            _parse_cached.cache_clear()
 
-        flat_data = data.flatten()
+    def load_spectrum(file: str, window: str = None, reduce_noise: bool = False) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Parse a .sif file and return its windowed, optionally denoised, wavelengths and counts.
 
-        df = np.column_stack((wavelengths, flat_data))
-        return df, info
+        Parameters
+        ----------
+        file: str
+            Path to a .sif file.
+
+        window: str, optional
+            Type of windowing to apply, see MATH.slice_window (default is None).
+
+        reduce_noise: bool, optional
+            If True, remove spikes with MATH.gradient_n_sigma (default is False).
+
+        Returns
+        -------
+        tuple: (np.ndarray, np.ndarray)
+            A tuple containing the wavelength and count data. With the parse cache enabled and
+            no noise reduction, these are read-only views of the cached parse; copy them before
+            modifying them in place.
+        """
+        data, _ = _parse_shared(file)
+        if window:
+            data = MATH.slice_window(data, window=window)
+        wavelengths, counts = data[:, 0], data[:, 1]
+
+        if reduce_noise:
+            wavelengths, counts = MATH.gradient_n_sigma(wavelengths, counts)
+
+        return wavelengths, counts
+
+    def load_spectra(files: typing.List[str], window: str = None, reduce_noise: bool = False) -> typing.List[typing.Tuple[np.ndarray, np.ndarray]]:
+        """
+        Load the windowed, optionally denoised, wavelengths and counts of several .sif files.
+
+        Parameters
+        ----------
+        files: List[str]
+            Paths to .sif files.
+
+        window: str, optional
+            Type of windowing to apply, see MATH.slice_window (default is None).
+
+        reduce_noise: bool, optional
+            If True, remove spikes with MATH.gradient_n_sigma (default is False).
+
+        Returns
+        -------
+        list: List[Tuple[np.ndarray, np.ndarray]]
+            The result of load_spectrum() for each file, in the order given.
+        """
+        return [FILE.load_spectrum(file, window=window, reduce_noise=reduce_noise) for file in files]
 
 
     def extract_files_from_folder(path: str, file_extension: str = '.sif') -> typing.List[str]:
@@ -108,15 +314,52 @@ class FILE:
         Returns
         -------
         list: List[str]
-            A list of filenames with the specified extension.
+            A sorted list of filenames with the specified extension.
         """
-        return [f for f in os.listdir(path) if f.endswith(file_extension)]
+        # scandir reports the entry type from the directory listing, so no extra stat per file
+        with os.scandir(path) as entries:
+            files = [entry.name for entry in entries if entry.name.endswith(file_extension) and entry.is_file()]
+        files.sort()
+        return files
 
-    def extract_positions(files, _pos: int):
-        # Adjust this method to return indices from filenames
-        sep = [file.split('_')[_pos] for file in files]
-        pos = [int(idx.split('.')[0]) for idx in sep]
-        return pos
+    def parse_folder(path: str, file_extension: str = '.sif') -> typing.List[typing.Tuple[np.ndarray, OrderedDict]]:
+        """
+        Parse every file with a specific extension in a folder.
+
+        Parameters
+        ----------
+        path: str
+            Path to the folder.
+        
+        file_extension: str, optional
+            File extension to filter by (default is '.sif').
+        
+        Returns
+        -------
+        list: List[Tuple[np.ndarray, OrderedDict]]
+            The result of parse() for each file, in the sorted order of extract_files_from_folder().
+        """
+        return [FILE.parse(os.path.join(path, file)) for file in FILE.extract_files_from_folder(path, file_extension)]
+
+    def extract_positions(files: typing.List[str], _pos: int) -> np.ndarray:
+        """
+        Extract image indices from filenames as an integer array.
+
+        Parameters
+        ----------
+        files: List[str]
+            Filenames such as 'scan_12.sif'.
+
+        _pos: int
+            Index of the '_'-separated field that holds the image index.
+
+        Returns
+        -------
+        np.ndarray
+            1D int64 array of image indices, aligned with files.
+        """
+        return np.fromiter((int(file.split('_')[_pos].split('.')[0]) for file in files),
+                           dtype=np.int64, count=len(files))
 
     def extract_info(info: OrderedDict, show_info: str) -> None:
         """
@@ -130,9 +373,8 @@ class FILE:
         show_info: str
             String flag to indicate whether to print the info. Should be 'true' to print.
         """
-        if show_info.lower() == 'true':
-            for key, value in info.items():
-                print(f"{key}: {value}")
+        if show_info.lower() == 'true' and info:
+            print('\n'.join(f"{key}: {value}" for key, value in info.items()))
 
 
 class MATH:
@@ -171,16 +413,21 @@ class MATH:
         tuple: (np.ndarray, np.ndarray)
             A tuple containing filtered wavelength and count data.
         """
+        wavelengths, counts = np.asarray(wavelengths), np.asarray(counts)
+
         gradients = np.diff(counts)
         mean_gradient = np.mean(gradients)
-        std_gradient = np.std(gradients)
+
+        # Same two-pass std as np.std, but the deviations are kept and reused for the threshold test
+        deviations = gradients - mean_gradient
+        std_gradient = np.sqrt(np.mean(np.square(deviations)))
         threshold = sigma * std_gradient
-        spike_indices = np.where(np.abs(gradients - mean_gradient) > threshold)[0]
 
-        filtered_wavelengths = np.delete(wavelengths, spike_indices + 1)  # +1 to correct the shift caused by np.diff
-        filtered_counts = np.delete(counts, spike_indices + 1)
+        # One mask shared by both arrays; gradient i belongs to point i+1, the first point is always kept
+        keep = np.ones(len(counts), dtype=bool)
+        keep[1:] = ~(np.abs(deviations, out=deviations) > threshold)
 
-        return filtered_wavelengths, filtered_counts
+        return wavelengths[keep], counts[keep]
 
 
     def slice_window(data: np.ndarray, window: str) -> np.ndarray:
@@ -198,24 +445,18 @@ class MATH:
         Returns
         -------
         np.ndarray
-            The sliced data array.
+            The sliced data array. This is a view of `data`, not a copy, and shares its
+            writeability: slices of a read-only array, such as a cached parse, are read-only too.
         """
+        divisor = _WINDOW_DIVISORS.get(window)
+        if divisor is None:
+            return data
 
-        if window == 'reduced':
-            remove_count = len(data) // 10
-            data = data[remove_count:-remove_count]
-        
-        elif window == 'narrow':
-            remove_count = len(data) // 4
-            data = data[remove_count:-remove_count]
-
-        elif window == 'pinched':
-            remove_count = len(data) // 3
-            data = data[remove_count:-remove_count]
-
-        return data
+        remove_count = len(data) // divisor
+        return data[remove_count:len(data) - remove_count]
 
     def normalize_array(array):
+        array = np.asarray(array)
         array_min = np.min(array)
         array_max = np.max(array)
         
@@ -223,5 +464,6 @@ class MATH:
         if array_max - array_min == 0:
             return np.zeros_like(array)
         
-        normalized_array = (array - array_min) / (array_max - array_min)
+        normalized_array = np.subtract(array, array_min, dtype=np.result_type(array, 1.0))
+        normalized_array /= array_max - array_min
         return normalized_array
\ No newline at end of file